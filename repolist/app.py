@@ -1,45 +1,173 @@
 import os
+import time
+from collections import OrderedDict
+from functools import wraps
 
-from flask import Flask, abort, jsonify
+import orjson
+from quart import Quart, request
 
-from logic import API, InvalidUserError, UserQuotaExceededError
+from logic import (DEFAULT_CONCURRENCY, API, GraphQLError,
+                   InvalidUserError, RequestFailedError,
+                   ServiceUnavailableError, UserQuotaExceededError)
 
-app = Flask(__name__)
+app = Quart(__name__)
 
 auth_token = os.environ.get('GITHUB_TOKEN')
 username = os.environ.get('GITHUB_USER')
+concurrency = int(os.environ.get('GITHUB_CONCURRENCY', DEFAULT_CONCURRENCY))
 url = 'https://api.github.com'
-api = API(url, auth_token=auth_token, username=username)
+api = API(url, auth_token=auth_token, username=username,
+          concurrency=concurrency)
+
+# Number of seconds responses are cached for, matching the max-age
+# GitHub sends in the Cache-Control header of the resources used
+cache_ttl = float(os.environ.get('CACHE_TTL', 60))
+# Maximum number of responses cached per endpoint
+CACHE_SIZE = 1024
+
+
+class InvalidQueryParamError(Exception):
+    pass
+
+
+def json_response(body, status=200):
+    """Creates a JSON response from an already serialized body
+
+    Args:
+        body (bytes): JSON body of the response
+        status (int, optional): Status code of the response.
+            Defaults to 200.
+
+    Returns:
+        quart.Response: JSON response
+    """
+    return app.response_class(
+        body, status=status, mimetype='application/json')
+
+
+def cached_json(*params):
+    """Caches the JSON returned by the decorated view for cache_ttl
+    seconds, keyed by the view's arguments and the values of given
+    query string parameters. The rest of the query string is ignored,
+    so that it can't be used to bypass the cache or evict its entries.
+    Once more than CACHE_SIZE responses are cached, the least recently
+    used one is evicted. The view is expected to return its JSON already serialized, so that
+    cache hits skip the serialization entirely.
+
+    Args:
+        *params (str): Names of the query string parameters used
+            by the view
+
+    Returns:
+        function: Decorator turning a view returning a JSON body as
+            bytes into a view returning a JSON response
+    """
+    def decorator(view):
+        cache = OrderedDict()
+
+        @wraps(view)
+        async def cached_view(**kwargs):
+            key = (
+                tuple(sorted(kwargs.items())),
+                tuple([request.args.get(param) for param in params])
+            )
+            now = time.monotonic()
+            if (entry := cache.get(key)) is not None and entry[0] > now:
+                # Keeps the entries in the order they were last used in,
+                # so that the least recently used one is evicted first
+                cache.move_to_end(key)
+                body = entry[1]
+            else:
+                body = await view(**kwargs)
+                cache[key] = (now + cache_ttl, body)
+                cache.move_to_end(key)
+                if len(cache) > CACHE_SIZE:
+                    cache.popitem(last=False)
+            return json_response(body)
+
+        return cached_view
+
+    return decorator
+
+
+@app.before_serving
+async def open_api_session():
+    await api.open()
+
+
+@app.after_serving
+async def close_api_session():
+    await api.close()
+
+
+@app.errorhandler(InvalidQueryParamError)
+def handle_invalid_query_param(e):
+    return json_response(orjson.dumps({
+        'message': f'Invalid value of the {e} query string parameter'
+    }), 400)
 
 
 @app.errorhandler(InvalidUserError)
 def handle_invalid_user(e):
-    return ({
+    return json_response(orjson.dumps({
         'message': 'User not found'
-    }, 404)
+    }), 404)
 
 
 @app.errorhandler(UserQuotaExceededError)
 def handle_exceeded_user_quota(e):
-    return ({
+    return json_response(orjson.dumps({
         'message': 'User quota exceeded'
-    }, 403)
+    }), 403)
+
+
+@app.errorhandler(ServiceUnavailableError)
+def handle_service_unavailable(e):
+    return json_response(orjson.dumps({
+        'message': 'GitHub API unavailable'
+    }), 503)
+
+
+@app.errorhandler(RequestFailedError)
+def handle_request_failed(e):
+    return json_response(orjson.dumps({
+        'message': 'GitHub API request failed'
+    }), 502)
+
+
+@app.errorhandler(GraphQLError)
+def handle_graphql_error(e):
+    return json_response(orjson.dumps({
+        'message': 'GitHub API query failed'
+    }), 502)
 
 
 @app.get('/user/<username>/repos')
+@cached_json()
 async def get_user_repos(username):
     data = [repo async for repo in api.get_user_repos(username)]
-    return jsonify(data)
+    return orjson.dumps(data)
 
 
 @app.get('/user/<username>/stars')
+@cached_json()
 async def get_user_star_sum(username):
-    return {
+    return orjson.dumps({
         'star_count': await api.get_user_star_total(username)
-    }
+    })
 
 
 @app.get('/user/<username>/languages')
+@cached_json('top')
 async def get_user_languages(username):
-    data = await api.get_users_language_list(username)
-    return jsonify(data)
+    # Counter.most_common would return no languages for a top below 1,
+    # and request.args.get would silently ignore a top that isn't an int
+    if (top := request.args.get('top')) is not None:
+        try:
+            top = int(top)
+        except ValueError:
+            raise InvalidQueryParamError('top')
+        if top < 1:
+            raise InvalidQueryParamError('top')
+    data = await api.get_users_language_list(username, top=top)
+    return orjson.dumps(data)
@@ -1,8 +1,60 @@
 import asyncio
 import re
-from collections import defaultdict
+from collections import Counter, OrderedDict
+from operator import itemgetter
 
 import aiohttp
+import orjson
+
+# Default maximum number of requests made to the GitHubAPI at once
+DEFAULT_CONCURRENCY = 32
+# Maximum number of times a failed request is retried
+MAX_RETRIES = 3
+# Maximum number of responses kept in the API's ETag cache
+ETAG_CACHE_SIZE = 1024
+# Maximum total size in bytes of the bodies kept in the API's ETag cache
+ETAG_CACHE_BYTES = 64 * 1024 * 1024
+# Maximum number of repository pages fetched, or waiting to be
+# handled, at the same time
+PAGE_QUEUE_SIZE = 8
+
+# Gets the fields of a repository returned by the GitHubAPI that are
+# included in the list of user's repositories
+_REPO_FIELDS = itemgetter('id', 'full_name', 'stargazers_count')
+_STAR_COUNT = itemgetter('stargazers_count')
+_STARGAZER_COUNT = itemgetter('stargazerCount')
+# Matches the number of the last page of results in the 'Link' header
+_LAST_PAGE_RE = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+# Gets the languages of user's repositories, 100 repositories at a time.
+# Only public repositories owned by the user are included, the same
+# as in the repositories listed by the REST API.
+_LANGUAGES_QUERY = """
+query($login: String!, $cursor: String) {
+  repositoryOwner(login: $login) {
+    repositories(
+      first: 100, after: $cursor, privacy: PUBLIC, ownerAffiliations: OWNER
+    ) {
+      pageInfo { endCursor hasNextPage }
+      nodes { languages(first: 100) { edges { size node { name } } } }
+    }
+  }
+}
+"""
+# Gets the star counts of user's repositories, 100 repositories at a time
+_STARS_QUERY = """
+query($login: String!, $cursor: String) {
+  repositoryOwner(login: $login) {
+    repositories(
+      first: 100, after: $cursor, privacy: PUBLIC, ownerAffiliations: OWNER
+    ) {
+      pageInfo { endCursor hasNextPage }
+      nodes { stargazerCount }
+    }
+  }
+}
+"""
+# Sentinel put on the page queue by a worker when it's finished
+_WORKER_DONE = object()
 
 
 class InvalidUserError(Exception):
@@ -13,9 +65,38 @@ class UserQuotaExceededError(Exception):
     pass
 
 
+class ServiceUnavailableError(Exception):
+    pass
+
+
+class GraphQLError(Exception):
+    pass
+
+
+class RequestFailedError(Exception):
+    pass
+
+
+class _DecodedResponse:
+    """Response-like object serving a body already read and decoded by
+    the API, exposing the parts of aiohttp.ClientResponse used by it.
+    The connection the body was read from has already been released,
+    so unlike aiohttp.ClientResponse it's not used as a context manager.
+    """
+
+    def __init__(self, headers, body):
+        self.status = 200
+        self.headers = headers
+        self._body = body
+
+    async def json(self, **kwargs):
+        return self._body
+
+
 class API:
 
-    def __init__(self, url, *, username=None, auth_token=None):
+    def __init__(self, url, *, username=None, auth_token=None,
+                 concurrency=DEFAULT_CONCURRENCY):
         """API Object Consstructor
 
         Args:
@@ -24,16 +105,134 @@ class API:
                 to the GitHubAPI. Defaults to None.
             auth_token (str, optional): GitHub Personal Access Token.
                 Defaults to None.
+            concurrency (int, optional): Maximum number of requests made
+                to the GitHubAPI at the same time.
+                Defaults to DEFAULT_CONCURRENCY.
         """
         self.api_url = url
-        self._headers = {}
+        self._headers = {'Accept': 'application/vnd.github.v3+json'}
+        self._authenticated = auth_token is not None
         if auth_token is not None:
             self._headers['Authorization'] = f'token {auth_token}'
         if username is not None:
             self._headers['User-Agent'] = username
+        self._concurrency = concurrency
+        # Query string parameters shared by requests for all of the
+        # pages of user's repositories. 100 is the largest page size
+        # GitHub allows, minimizing the number of pages to fetch.
+        self._repo_page_params = {'per_page': 100}
+        self._loop = None
+        self._session = None
+        self._sem = None
+        # Maps (URL, query string parameters) to (ETag, headers, body)
+        # of the last response received for them. The bodies are kept
+        # as raw bytes, which take far less memory than decoded JSON.
+        self._etag_cache = OrderedDict()
+        self._etag_cache_bytes = 0
+
+    def _bind_loop(self):
+        """Binds the session and the request semaphore to the running
+        event loop, dropping the ones created in a different loop, as
+        neither of them can be used outside of the loop they belong to.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._session = None
+            self._sem = asyncio.Semaphore(self._concurrency)
+
+    async def _get_session(self):
+        """Returns the session shared by all of the API's requests,
+        creating it on first use. A new session is created if the
+        cached one has been closed or belongs to a different event loop.
+
+        Returns:
+            aiohttp.ClientSession: Session used for making HTTP requests
+        """
+        self._bind_loop()
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._concurrency,
+                limit_per_host=self._concurrency,
+                use_dns_cache=True,
+                ttl_dns_cache=600,
+                keepalive_timeout=120,
+                enable_cleanup_closed=True)
+            self._session = aiohttp.ClientSession(
+                headers=self._headers, connector=connector)
+        return self._session
+
+    async def open(self):
+        """Opens the shared session ahead of the first request"""
+        await self._get_session()
+
+    async def close(self):
+        """Closes the shared session, if one has been opened"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def _request(self, method, url, **kwargs):
+        """Makes a request to the GitHubAPI and reads the body of its
+        response, if it's successful. Requests failing with a server
+        error or hitting a secondary rate limit are retried up to
+        MAX_RETRIES times, with an exponentially growing delay. Only 2xx
+        responses are treated as successful, and the connection of any
+        other response is released without reading its body.
+
+        Args:
+            method (coroutine function): Method of the session making
+                the request, such as aiohttp.ClientSession.get
+            url (str): URL to request
+            **kwargs: Other arguments of the request passed to method
+
+        Raises:
+            UserQuotaExceededError: If GitHubAPI request quota has
+                been exceeded
+            ServiceUnavailableError: If GitHubAPI kept responding with
+                server errors after all of the retries
+
+        Returns:
+            tuple: Status code and headers of the response, and its
+                raw body, which is None if the response isn't a 2xx
+        """
+        self._bind_loop()
+        for attempt in range(MAX_RETRIES + 1):
+            async with self._sem:
+                res = await method(url, **kwargs)
+                status = res.status
+                if 200 <= status < 300:
+                    async with res:
+                        body = await res.read()
+                    return status, res.headers, body
+                res.release()
+
+            # Only server errors and secondary rate limits, which come
+            # with a 'Retry-After' header, are worth retrying
+            retry_after = res.headers.get('Retry-After')
+            if status in (403, 429):
+                if retry_after is None or attempt == MAX_RETRIES:
+                    raise UserQuotaExceededError
+            elif status < 500:
+                return status, res.headers, None
+            elif attempt == MAX_RETRIES:
+                raise ServiceUnavailableError
+            await asyncio.sleep(max(2 ** attempt, float(retry_after or 0)))
 
     async def _fetch(self, session, url, *, headers={}, params={}):
-        """Fetches given URL
+        """Fetches given URL and decodes the JSON body of the response.
+        If a response for the same URL and parameters has been cached,
+        the request is made conditional on its ETag, and the cached body
+        is reused if GitHub responds with 304 Not Modified, which doesn't
+        count against the request quota. Failed requests are retried as
+        described in _request.
 
         Args:
             session (aiohttp.ClientSession): Session used for making HTTP
@@ -48,16 +247,124 @@ class API:
                 URL does not exist
             UserQuotaExceededError: If GitHubAPI request quota has
                 been exceeded
+            ServiceUnavailableError: If GitHubAPI kept responding with
+                server errors after all of the retries
+            RequestFailedError: If GitHubAPI responded with any other
+                client error, such as 401 Unauthorized
 
         Returns:
-            aiohttp.ClientResponse: Response fetched from given URL
+            _DecodedResponse: Response fetched from given URL
         """
-        res = await session.get(url, headers=headers, params=params)
-        if (status := res.status) == 404:
+        key = (url, tuple(sorted(params.items())))
+        if (cached := self._etag_cache.get(key)) is not None:
+            headers = {**headers, 'If-None-Match': cached[0]}
+
+        status, res_headers, body = await self._request(
+            session.get, url, headers=headers, params=params)
+        if status == 304 and cached is not None:
+            # Stores the cached response again, as other requests may
+            # have evicted it while this one was in flight
+            etag, res_headers, body = cached
+        elif status == 404:
             raise InvalidUserError
-        elif status == 403:
-            raise UserQuotaExceededError
-        return res
+        elif not 200 <= status < 300:
+            raise RequestFailedError(status)
+        else:
+            etag = res_headers.get('ETag')
+
+        if etag is not None:
+            self._cache_response(key, (etag, res_headers, body))
+        # Decodes the raw bytes of the body directly, skipping
+        # their conversion to str done by ClientResponse.json
+        return _DecodedResponse(res_headers, orjson.loads(body))
+
+    def _cache_response(self, key, entry):
+        """Stores a response in the ETag cache as its most recently used
+        entry. The least recently used entries are evicted once the cache
+        holds more than ETAG_CACHE_SIZE responses, or more than
+        ETAG_CACHE_BYTES bytes of their bodies.
+
+        Args:
+            key (tuple): URL and query string parameters of the response
+            entry (tuple): ETag, headers and raw body of the response
+        """
+        if (old_entry := self._etag_cache.pop(key, None)) is not None:
+            self._etag_cache_bytes -= len(old_entry[2])
+        self._etag_cache[key] = entry
+        self._etag_cache_bytes += len(entry[2])
+        while (len(self._etag_cache) > ETAG_CACHE_SIZE
+               or self._etag_cache_bytes > ETAG_CACHE_BYTES):
+            _, (_, _, body) = self._etag_cache.popitem(last=False)
+            self._etag_cache_bytes -= len(body)
+
+    async def _graphql(self, query, variables):
+        """Runs given query against the GitHub GraphQL API. Failed
+        requests are retried as described in _request.
+
+        Args:
+            query (str): GraphQL query
+            variables (dict): Values of the query's variables
+
+        Raises:
+            InvalidUserError: If the query refers to a user that
+                does not exist
+            UserQuotaExceededError: If GitHubAPI request quota has
+                been exceeded
+            ServiceUnavailableError: If GitHubAPI kept responding with
+                server errors after all of the retries
+            RequestFailedError: If GitHubAPI responded with any other
+                client error, such as 401 Unauthorized
+            GraphQLError: If the query has failed for any other reason
+
+        Returns:
+            dict: Data returned by the query
+        """
+        session = await self._get_session()
+        url = f'{self.api_url}/graphql'
+        payload = orjson.dumps({'query': query, 'variables': variables})
+        headers = {'Content-Type': 'application/json'}
+        status, _, body = await self._request(
+            session.post, url, data=payload, headers=headers)
+        if not 200 <= status < 300:
+            raise RequestFailedError(status)
+
+        body = orjson.loads(body)
+        for error in body.get('errors', ()):
+            if (error_type := error.get('type')) == 'NOT_FOUND':
+                raise InvalidUserError
+            elif error_type == 'RATE_LIMITED':
+                raise UserQuotaExceededError
+            raise GraphQLError(error.get('message'))
+        if (data := body.get('data')) is None:
+            raise GraphQLError('Response has no data')
+        return data
+
+    async def _iter_graphql_repos(self, query, user):
+        """Runs given query for each page of user's repositories. The
+        query has to take the user's login and a page cursor as the
+        $login and $cursor variables, and select the nodes and pageInfo
+        of repositoryOwner's repositories.
+
+        Args:
+            query (str): GraphQL query
+            user (str): Username of the GitHub user
+
+        Raises:
+            InvalidUserError: If user of the given username does not exist
+
+        Yields:
+            list: Repository nodes returned by the query
+        """
+        variables = {'login': user, 'cursor': None}
+        while True:
+            data = await self._graphql(query, variables)
+            if (owner := data['repositoryOwner']) is None:
+                raise InvalidUserError
+            repos = owner['repositories']
+            yield repos['nodes']
+            if not repos['pageInfo']['hasNextPage']:
+                return
+            variables['cursor'] = repos['pageInfo']['endCursor']
 
     async def get_user_repos(self, username):
         """Gets repositories of given user from the GitHubAPI
@@ -73,49 +380,130 @@ class API:
                     'star_count': star count of the repository
                 }
         """
+        async for raw_repos in self._iter_raw_pages(username):
+            for repo in raw_repos:
+                repo_id, name, star_count = _REPO_FIELDS(repo)
+                yield {'id': repo_id, 'name': name, 'star_count': star_count}
+
+    async def _iter_raw_pages(self, username):
+        """Iterates over pages of user's repositories in the format
+        returned by the GitHubAPI
+
+        Args:
+            username (str): Username of the GitHub user
+
+        Yields:
+            list: Page of repositories returned by the GitHubAPI
+        """
         async for res in self._fetch_pages(username):
-            async with res:
-                raw_repos = await res.json()
-                for repo in self._yield_repos(raw_repos):
-                    yield repo
-    
+            yield await res.json()
+
     async def _fetch_pages(self, username):
         """Fetches each page of user's repositories from the GitHubAPI. 
         Checks if all of user's repositories are on the first page of
         results, if not, grabs the number of the last page of results 
         from the first response's header and asynchronously fetches all
-        the other pages.
+        the other pages, yielding each of them as soon as it arrives.
 
         Args:
             username (str): Username of the GitHub user
 
         Yields:
-            aiohttp.ClientResponse: Response containing user's repositories
+            _DecodedResponse: Response containing user's repositories
                 fetched from the GitHubAPI
         """
-        async with aiohttp.ClientSession() as session:
-            first_res = await self._fetch_repo_page(session, username, 1)
-            yield first_res
+        session = await self._get_session()
+        first_res = await self._fetch_repo_page(session, username, 1)
+        yield first_res
+
+        # Stops function's execution if all of the user's
+        # repos are on the first page of the results.
+        if (links := first_res.headers.get('Link')) is None:
+            return
+        if (last_page := self._parse_last_page(links)) is None:
+            return
+
+        # Fetches all the other pages using a fixed number of workers,
+        # which put the responses on a bounded queue, so that already
+        # fetched pages are handled while the next ones are in flight
+        pages = iter(range(2, last_page + 1))
+        queue = asyncio.Queue(maxsize=PAGE_QUEUE_SIZE)
+
+        async def fetch_worker():
+            try:
+                for page in pages:
+                    res = await self._fetch_repo_page(session, username, page)
+                    await queue.put(res)
+            except Exception as e:
+                await queue.put(e)
+            # Not put in a finally block, as a cancelled worker would
+            # wait forever for room on a queue that's no longer read
+            await queue.put(_WORKER_DONE)
+
+        worker_count = min(PAGE_QUEUE_SIZE, last_page - 1)
+        workers = [
+            asyncio.create_task(fetch_worker()) for _ in range(worker_count)]
+        try:
+            while worker_count:
+                item = await queue.get()
+                if item is _WORKER_DONE:
+                    worker_count -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def _parse_last_page(self, links):
+        """Gets the number of the last page of results from the 'Link'
+        header of a paginated GitHubAPI response
 
-            # Stops function's execution if all of the user's
-            # repos are on the first page of the results.
-            if (links := first_res.headers.get('Link')) is None:
-                return
+        Args:
+            links (str): Value of the 'Link' header
+
+        Returns:
+            int: Number of the last page of results, or None if the
+                header doesn't link to the last page
+        """
+        if (last_page_match := _LAST_PAGE_RE.search(links)) is None:
+            return None
+        return int(last_page_match.group(1))
+
+    async def _collect_raw_repo_pages(self, username):
+        """Fetches all pages of user's repositories from the GitHubAPI.
+        Once the number of the last page is read from the first page,
+        all the other pages are fetched at once.
+
+        Args:
+            username (str): Username of the GitHub user
 
-            # Searches for the number of the last page of
-            # results in the 'Link' header of the first response
-            last_page_match = re.search(
-                r'page=(\d+)>; rel="last"', links)
-            last_page = int(last_page_match.group(1))
-
-            # Fetches all the other pages
-            tasks = []
-            for i in range(2, last_page + 1):
-                task = asyncio.create_task(
-                    self._fetch_repo_page(session, username, i))
-                tasks.append(task)
-            for res in asyncio.as_completed(tasks):
-                yield await res
+        Returns:
+            list: List of pages, each being a list of repositories
+                in the format returned by the GitHubAPI
+        """
+        session = await self._get_session()
+        first_res = await self._fetch_repo_page(session, username, 1)
+        pages = [await first_res.json()]
+        if (links := first_res.headers.get('Link')) is None:
+            return pages
+        if (last_page := self._parse_last_page(links)) is None:
+            return pages
+
+        # Cancels the remaining requests once any of them fails
+        tasks = [
+            asyncio.create_task(self._fetch_repo_page(session, username, page))
+            for page in range(2, last_page + 1)
+        ]
+        try:
+            for res in await asyncio.gather(*tasks):
+                pages.append(await res.json())
+        finally:
+            for task in tasks:
+                task.cancel()
+        return pages
 
     async def _fetch_repo_page(self, session, username, page):
         """Fetches specified page of user's GitHub repositories from the
@@ -128,65 +516,153 @@ class API:
             page (int): Number of the page to fetch
 
         Returns:
-            aiohttp.ClientResponse: Response containing user's repositories
+            _DecodedResponse: Response containing user's repositories
                 fetched from the GitHubAPI
         """
         url = f'{self.api_url}/users/{username}/repos'
-        kwargs = {
-            'headers': self._headers,
-            'params': {
-                'per_page': 100,
-                'page': page
-            }
-        }
-        return await self._fetch(session, url, **kwargs)
+        params = {**self._repo_page_params, 'page': page}
+        return await self._fetch(session, url, params=params)
 
-    def _yield_repos(self, repos):
-        """Converts repositories returned by GitHubAPI into dictionaries
-        containing their id, full_name and star_count
+    async def get_user_repo_count(self, username):
+        """Counts user's GitHub repositories with a single request, by
+        fetching the repositories one per page, and getting the number
+        of the last page of results.
 
         Args:
-            repos (list): List of repositories returned by GitHubAPI
+            username (str): Username of the GitHub user
 
-        Yields:
-            dict: Dictionary containing repository id, full name and
-                    star_count of the following format:
-                {
-                    'id': ID of the repository,
-                    'name': full name of the repository,
-                    'star_count': stargazer_count of the repository
-                }
+        Returns:
+            int: Number of the user's GitHub repositories
         """
-        for repo in repos:
-            res = {
-                'id': repo['id'],
-                'name': repo['full_name'],
-                'star_count': repo['stargazers_count']
-            }
-            yield res
+        session = await self._get_session()
+        url = f'{self.api_url}/users/{username}/repos'
+        params = {'per_page': 1, 'page': 1}
+        res = await self._fetch(session, url, params=params)
+        if (links := res.headers.get('Link')) is not None:
+            if (last_page := self._parse_last_page(links)) is not None:
+                return last_page
+        return len(await res.json())
 
     async def get_user_star_total(self, user):
         """Calculates the total amount of star_count across all of
-        the given user's GitHub repositories
+        the given user's GitHub repositories. The star counts are
+        fetched using the GraphQL API if the API is authenticated,
+        and using the REST API otherwise.
+
+        Args:
+            user (str): Username of the GitHub user
+
+        Returns:
+            int: The total star count across all of the
+                users GitHub repositories
+        """
+        if self._authenticated:
+            return await self._count_stars_graphql(user)
+        pages = await self._collect_raw_repo_pages(user)
+        return sum([sum(map(_STAR_COUNT, page)) for page in pages])
+
+    async def _count_stars_graphql(self, user):
+        """Calculates the total star count across all of the given
+        user's GitHub repositories using the GraphQL API, requesting
+        nothing but the star count of each repository.
 
         Args:
             user (str): Username of the GitHub user
 
+        Raises:
+            InvalidUserError: If user of the given username does not exist
+
         Returns:
             int: The total star count across all of the
                 users GitHub repositories
         """
-        repos = self.get_user_repos(user)
-        return sum([repo['star_count'] async for repo in repos])
+        total = 0
+        async for repos in self._iter_graphql_repos(_STARS_QUERY, user):
+            total += sum(map(_STARGAZER_COUNT, repos))
+        return total
+
+    async def _fetch_repo_languages(self, session, repo_name):
+        """Fetches the languages of given GitHub repository
+
+        Args:
+            session (aiohttp.ClientSession): Session used for making HTTP
+            requests
+            repo_name (str): Full name of the repository
+
+        Returns:
+            dict: Dictionary mapping names of the languages used in the
+                repository to the number of bytes written in them
+        """
+        url = f'{self.api_url}/repos/{repo_name}/languages'
+        res = await self._fetch(session, url)
+        return await res.json()
+
+    async def _count_languages_rest(self, user):
+        """Counts bytes written in each programming language across all
+        of the given user's GitHub repositories using the REST API,
+        which requires one request per repository.
+
+        Args:
+            user (str): Username of the user
+
+        Returns:
+            collections.Counter: Counter mapping names of the languages
+                to the number of bytes written in them
+        """
+        langs = Counter()
+        session = await self._get_session()
+        # Starts fetching the languages of each repository as soon as
+        # it arrives, while the remaining pages of repositories are
+        # still being fetched
+        tasks = []
+        try:
+            async for repo in self.get_user_repos(user):
+                coro = self._fetch_repo_languages(session, repo['name'])
+                tasks.append(asyncio.create_task(coro))
+            for repo_langs in await asyncio.gather(*tasks):
+                langs.update(repo_langs)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return langs
+
+    async def _count_languages_graphql(self, user):
+        """Counts bytes written in each programming language across all
+        of the given user's GitHub repositories using the GraphQL API,
+        which returns the languages of up to 100 repositories at once.
+
+        Args:
+            user (str): Username of the user
 
-    async def get_users_language_list(self, user):
+        Raises:
+            InvalidUserError: If user of the given username does not exist
+
+        Returns:
+            collections.Counter: Counter mapping names of the languages
+                to the number of bytes written in them
+        """
+        langs = Counter()
+        async for repos in self._iter_graphql_repos(_LANGUAGES_QUERY, user):
+            for repo in repos:
+                langs.update({
+                    edge['node']['name']: edge['size']
+                    for edge in repo['languages']['edges']
+                })
+        return langs
+
+    async def get_users_language_list(self, user, *, top=None):
         """Creates an ordered list of the most popular programming
         languages across all of the given user's GitHub
         repositories, ranked from most popular, to least popular
         by the number of bytes written in a given language.
+        The languages are fetched using the GraphQL API if the API is
+        authenticated, as GitHub doesn't allow anonymous GraphQL
+        requests, and using the REST API otherwise.
 
         Args:
             user (str): Username of the user
+            top (int, optional): Number of the most popular languages
+                to return. Defaults to None, returning all of them.
 
         Returns:
             list: List of user's most popular programming languages.
@@ -197,23 +673,14 @@ class API:
                         in a given language
                 }
         """
-        langs = defaultdict(lambda: 0)
-        async with aiohttp.ClientSession() as session:
-            tasks = []
-            async for repo in self.get_user_repos(user):
-                url = f"{self.api_url}/repos/{repo['name']}/languages"
-                coro = self._fetch(session, url, headers=self._headers)
-                tasks.append(asyncio.create_task(coro))
-
-            for task in asyncio.as_completed(tasks):
-                res = await task
-                repo_langs = await res.json()
-                for lang_name, byte_count in repo_langs.items():
-                    langs[lang_name] += byte_count
-
-        ranked_langs = sorted(
-            langs.items(), key=lambda x: x[1], reverse=True)
-        ret = []
-        for key, value in ranked_langs:
-            ret.append({'language': key, 'byte_count': value})
-        return ret
+        if self._authenticated:
+            langs = await self._count_languages_graphql(user)
+        else:
+            langs = await self._count_languages_rest(user)
+
+        # Counter.most_common sorts by count with operator.itemgetter,
+        # or picks the top items with heapq.nlargest if top is given
+        return [
+            {'language': key, 'byte_count': value}
+            for key, value in langs.most_common(top)
+        ]
@@ -0,0 +1,144 @@
+import sys
+from pathlib import Path
+
+import orjson
+import pytest
+
+# The app imports the logic module from its own directory
+sys.path.insert(0, str(Path(__file__).parent.parent / 'repolist'))
+import app  # noqa: E402
+from logic import GraphQLError, InvalidUserError  # noqa: E402
+
+test_langs = [{'language': 'Python', 'byte_count': 100}]
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+@pytest.fixture
+def monotonic(mocker):
+    clock = mocker.patch('app.time')
+    clock.monotonic.return_value = 0
+    return clock.monotonic
+
+
+@pytest.mark.asyncio
+async def test_with_cached_response(mocker, client, monotonic):
+    get_star_total = mocker.patch.object(
+        app.api, 'get_user_star_total', return_value=7)
+
+    first = await client.get('/user/cached_user/stars')
+    monotonic.return_value = app.cache_ttl - 1
+    second = await client.get('/user/cached_user/stars')
+
+    assert get_star_total.await_count == 1
+    assert await first.get_data() == await second.get_data()
+    assert orjson.loads(await second.get_data()) == {'star_count': 7}
+
+
+@pytest.mark.asyncio
+async def test_with_expired_response(mocker, client, monotonic):
+    get_star_total = mocker.patch.object(
+        app.api, 'get_user_star_total', side_effect=[7, 8])
+
+    await client.get('/user/expired_user/stars')
+    monotonic.return_value = app.cache_ttl
+    res = await client.get('/user/expired_user/stars')
+
+    assert get_star_total.await_count == 2
+    assert orjson.loads(await res.get_data()) == {'star_count': 8}
+
+
+@pytest.mark.asyncio
+async def test_with_full_cache(mocker, client, monotonic):
+    mocker.patch.object(app, 'CACHE_SIZE', 2)
+    get_star_total = mocker.patch.object(
+        app.api, 'get_user_star_total', return_value=7)
+
+    # full_user1 is requested again before full_user3 is cached, so the
+    # entry of full_user2 is the least recently used one, and evicted
+    users = ['full_user1', 'full_user2', 'full_user1', 'full_user3']
+    for user in users + ['full_user1', 'full_user2']:
+        await client.get(f'/user/{user}/stars')
+
+    assert get_star_total.await_args_list == [
+        mocker.call('full_user1'),
+        mocker.call('full_user2'),
+        mocker.call('full_user3'),
+        mocker.call('full_user2')
+    ]
+
+
+@pytest.mark.asyncio
+async def test_with_error_response(mocker, client, monotonic):
+    get_star_total = mocker.patch.object(
+        app.api, 'get_user_star_total', side_effect=[InvalidUserError, 7])
+
+    first = await client.get('/user/error_user/stars')
+    second = await client.get('/user/error_user/stars')
+
+    assert first.status_code == 404
+    assert second.status_code == 200
+    assert get_star_total.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_with_graphql_error(mocker, client):
+    mocker.patch.object(
+        app.api, 'get_user_star_total', side_effect=GraphQLError('FORBIDDEN'))
+
+    res = await client.get('/user/graphql_error_user/stars')
+
+    assert res.status_code == 502
+    assert res.mimetype == 'application/json'
+    assert orjson.loads(await res.get_data()) == {
+        'message': 'GitHub API query failed'
+    }
+
+
+@pytest.mark.asyncio
+async def test_with_unused_query_params(mocker, client, monotonic):
+    get_star_total = mocker.patch.object(
+        app.api, 'get_user_star_total', return_value=7)
+
+    await client.get('/user/params_user/stars')
+    await client.get('/user/params_user/stars', query_string={'x': 1})
+
+    assert get_star_total.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_with_top_query_param(mocker, client, monotonic):
+    get_langs = mocker.patch.object(
+        app.api, 'get_users_language_list', return_value=test_langs)
+
+    for top in [1, 2, 1]:
+        await client.get(
+            '/user/top_user/languages', query_string={'top': top})
+
+    assert get_langs.await_args_list == [
+        mocker.call('top_user', top=1),
+        mocker.call('top_user', top=2)
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'top',
+    ['abc', '1.5', '0', '-3'],
+    ids=['not_a_number', 'not_an_int', 'zero', 'negative']
+)
+async def test_with_invalid_top_query_param(mocker, client, top):
+    get_langs = mocker.patch.object(
+        app.api, 'get_users_language_list', return_value=test_langs)
+
+    res = await client.get(
+        '/user/invalid_top_user/languages', query_string={'top': top})
+
+    assert res.status_code == 400
+    assert orjson.loads(await res.get_data()) == {
+        'message': 'Invalid value of the top query string parameter'
+    }
+    assert not get_langs.called
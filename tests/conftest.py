@@ -0,0 +1,8 @@
+import pytest_asyncio
+from repolist.logic import API
+
+
+@pytest_asyncio.fixture
+async def api():
+    async with API('dummy.com') as api:
+        yield api
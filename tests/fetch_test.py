@@ -1,18 +1,34 @@
+import asyncio
+
 import aiohttp
+import orjson
 import pytest
-from repolist.logic import API, InvalidUserError, UserQuotaExceededError
-
-api = API('dummy.com')
+from repolist.logic import (MAX_RETRIES, API, GraphQLError,
+                            InvalidUserError, RequestFailedError,
+                            ServiceUnavailableError, UserQuotaExceededError)
 
 
 class ClientErrorResponseMock:
 
     def __init__(self, status):
         self.status = status
+        self.headers = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def read(self):
+        return b'{}'
+
+    def release(self):
+        pass
 
 
 @pytest.mark.asyncio
-async def test_with_200_success(mocker):
+async def test_with_200_success(mocker, api):
     async def mock_get_error(*args, **kwargs):
         return ClientErrorResponseMock(200)
 
@@ -26,7 +42,7 @@ async def test_with_200_success(mocker):
 
 
 @pytest.mark.asyncio
-async def test_with_404_error(mocker):
+async def test_with_404_error(mocker, api):
     async def mock_get_error(*args, **kwargs):
         return ClientErrorResponseMock(404)
 
@@ -41,7 +57,7 @@ async def test_with_404_error(mocker):
 
 
 @pytest.mark.asyncio
-async def test_with_403_error(mocker):
+async def test_with_403_error(mocker, api):
     async def mock_get_error(*args, **kwargs):
         return ClientErrorResponseMock(403)
 
@@ -53,3 +69,268 @@ async def test_with_403_error(mocker):
     with pytest.raises(UserQuotaExceededError):
         async with aiohttp.ClientSession() as session:
             await api._fetch(session, None)
+
+
+@pytest.mark.asyncio
+async def test_with_retried_502_error(mocker, api):
+    statuses = iter([502, 502, 200])
+
+    async def mock_get_error(*args, **kwargs):
+        return ClientErrorResponseMock(next(statuses))
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get_error
+    )
+    mock_sleep = mocker.patch('asyncio.sleep')
+
+    async with aiohttp.ClientSession() as session:
+        res = await api._fetch(session, None)
+
+    assert res.status == 200
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_with_retried_429_error(mocker, api):
+    rate_limited_res = ClientErrorResponseMock(429)
+    rate_limited_res.headers = {'Retry-After': '5'}
+    responses = iter([rate_limited_res, ClientErrorResponseMock(200)])
+
+    async def mock_get_error(*args, **kwargs):
+        return next(responses)
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get_error
+    )
+    mock_sleep = mocker.patch('asyncio.sleep')
+
+    async with aiohttp.ClientSession() as session:
+        res = await api._fetch(session, None)
+
+    assert res.status == 200
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [5]
+
+
+@pytest.mark.asyncio
+async def test_with_422_error(mocker, api):
+    async def mock_get_error(*args, **kwargs):
+        return ClientErrorResponseMock(422)
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get_error
+    )
+    mock_sleep = mocker.patch('asyncio.sleep')
+
+    with pytest.raises(RequestFailedError):
+        async with aiohttp.ClientSession() as session:
+            await api._fetch(session, None)
+    assert not mock_sleep.called
+
+
+@pytest.mark.asyncio
+async def test_with_persistent_502_error(mocker, api):
+    async def mock_get_error(*args, **kwargs):
+        return ClientErrorResponseMock(502)
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get_error
+    )
+    mock_sleep = mocker.patch('asyncio.sleep')
+
+    with pytest.raises(ServiceUnavailableError):
+        async with aiohttp.ClientSession() as session:
+            await api._fetch(session, None)
+    assert mock_sleep.call_count == MAX_RETRIES
+
+
+@pytest.mark.asyncio
+async def test_with_graphql_401_error(mocker, api):
+    async def mock_post_error(*args, **kwargs):
+        return ClientErrorResponseMock(401)
+
+    mocker.patch(
+        'aiohttp.ClientSession.post',
+        mock_post_error
+    )
+
+    with pytest.raises(RequestFailedError):
+        await api._graphql('query', {})
+
+
+class GraphQLResponseMock(ClientErrorResponseMock):
+
+    def __init__(self, data):
+        super().__init__(200)
+        self._body = orjson.dumps({'data': data})
+
+    async def read(self):
+        return self._body
+
+
+@pytest.mark.asyncio
+async def test_with_graphql_retried_502_error(mocker, api):
+    responses = iter([
+        ClientErrorResponseMock(502),
+        GraphQLResponseMock({'viewer': None})
+    ])
+
+    async def mock_post_error(*args, **kwargs):
+        return next(responses)
+
+    mocker.patch(
+        'aiohttp.ClientSession.post',
+        mock_post_error
+    )
+    mock_sleep = mocker.patch('asyncio.sleep')
+
+    assert await api._graphql('query', {}) == {'viewer': None}
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [1]
+
+
+@pytest.mark.asyncio
+async def test_with_graphql_missing_data(mocker, api):
+    async def mock_post(*args, **kwargs):
+        return ClientErrorResponseMock(200)
+
+    mocker.patch(
+        'aiohttp.ClientSession.post',
+        mock_post
+    )
+
+    with pytest.raises(GraphQLError):
+        await api._graphql('query', {})
+
+
+@pytest.mark.asyncio
+async def test_with_graphql_persistent_502_error(mocker, api):
+    async def mock_post_error(*args, **kwargs):
+        return ClientErrorResponseMock(502)
+
+    mocker.patch(
+        'aiohttp.ClientSession.post',
+        mock_post_error
+    )
+    mock_sleep = mocker.patch('asyncio.sleep')
+
+    with pytest.raises(ServiceUnavailableError):
+        await api._graphql('query', {})
+    assert mock_sleep.call_count == MAX_RETRIES
+
+
+class ClientETagResponseMock:
+
+    def __init__(self, status, data=None):
+        self.status = status
+        self.headers = {'ETag': '"test-etag"'}
+        self._data = orjson.dumps(data)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def read(self):
+        return self._data
+
+    def release(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_with_304_not_modified(mocker):
+    data = {'lang1': 1}
+    sent_headers = []
+
+    async def mock_get(*args, headers, **kwargs):
+        sent_headers.append(headers)
+        if headers.get('If-None-Match') == '"test-etag"':
+            return ClientETagResponseMock(304)
+        return ClientETagResponseMock(200, data)
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get
+    )
+
+    etag_api = API('dummy.com')
+    async with aiohttp.ClientSession() as session:
+        first_res = await etag_api._fetch(session, 'dummy.com/etag')
+        second_res = await etag_api._fetch(session, 'dummy.com/etag')
+
+    assert 'If-None-Match' not in sent_headers[0]
+    assert sent_headers[1]['If-None-Match'] == '"test-etag"'
+    assert await first_res.json() == data
+    assert await second_res.json() == data
+
+
+@pytest.mark.asyncio
+async def test_with_304_after_eviction(mocker):
+    data = {'lang1': 1}
+    other_cached = asyncio.Event()
+
+    async def mock_get(*args, headers, **kwargs):
+        if args[-1] == 'dummy.com/other':
+            other_cached.set()
+            return ClientETagResponseMock(200, {})
+        if headers.get('If-None-Match') == '"test-etag"':
+            # Responds once the other response has evicted this one
+            await other_cached.wait()
+            return ClientETagResponseMock(304)
+        return ClientETagResponseMock(200, data)
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get
+    )
+    mocker.patch('repolist.logic.ETAG_CACHE_SIZE', 1)
+
+    etag_api = API('dummy.com')
+    async with aiohttp.ClientSession() as session:
+        await etag_api._fetch(session, 'dummy.com/etag')
+        res, _ = await asyncio.gather(
+            etag_api._fetch(session, 'dummy.com/etag'),
+            etag_api._fetch(session, 'dummy.com/other')
+        )
+        assert await res.json() == data
+        assert list(etag_api._etag_cache) == [('dummy.com/etag', ())]
+
+
+@pytest.mark.asyncio
+async def test_with_unrequested_304(mocker, api):
+    async def mock_get(*args, **kwargs):
+        return ClientETagResponseMock(304)
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get
+    )
+
+    with pytest.raises(RequestFailedError):
+        async with aiohttp.ClientSession() as session:
+            await api._fetch(session, 'dummy.com/etag')
+
+
+@pytest.mark.asyncio
+async def test_with_full_etag_cache(mocker):
+    async def mock_get(*args, **kwargs):
+        return ClientETagResponseMock(200, {'lang1': 1})
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get
+    )
+    # Leaves room for the body of a single response
+    mocker.patch('repolist.logic.ETAG_CACHE_BYTES', 20)
+
+    etag_api = API('dummy.com')
+    async with aiohttp.ClientSession() as session:
+        await etag_api._fetch(session, 'dummy.com/first')
+        await etag_api._fetch(session, 'dummy.com/second')
+
+    assert list(etag_api._etag_cache) == [('dummy.com/second', ())]
+    assert etag_api._etag_cache_bytes == len(b'{"lang1":1}')
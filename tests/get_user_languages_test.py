@@ -1,19 +1,17 @@
 import re
 
+import orjson
 import pytest
-from repolist.logic import API
+from repolist.logic import API, InvalidUserError
 
-api = API('dummy.com')
-
-test_repos = []
-for i in range(3):
-    test_repos.append(
-        {
-            'id': i,
-            'name': f'test_user/repo{i}',
-            'star_count': i
-        }
-    )
+test_repos = [
+    {
+        'id': i,
+        'name': f'test_user/repo{i}',
+        'star_count': i
+    }
+    for i in range(3)
+]
 
 test_langs = {
     0: {
@@ -34,7 +32,8 @@ class ClientResponseMock:
 
     def __init__(self, data):
         self.status = 200
-        self._page = data
+        self.headers = {}
+        self._page = orjson.dumps(data)
 
     async def __aenter__(self):
         return self
@@ -42,12 +41,12 @@ class ClientResponseMock:
     async def __aexit__(self, *args):
         pass
 
-    async def json(self):
+    async def read(self):
         return self._page
 
 
 @pytest.mark.asyncio
-async def test_with_one_repo(mocker):
+async def test_with_one_repo(mocker, api):
     async def mock_get_user_repos(*args, **kwargs):
         yield test_repos[0]
 
@@ -80,7 +79,7 @@ async def test_with_one_repo(mocker):
 
 
 @pytest.mark.asyncio
-async def test_with_many_repos(mocker):
+async def test_with_many_repos(mocker, api):
     async def mock_get_user_repos(*args, **kwargs):
         for repo in test_repos:
             yield repo
@@ -116,3 +115,130 @@ async def test_with_many_repos(mocker):
 
     actual = await api.get_users_language_list('test_user')
     assert actual == exptected
+
+
+@pytest.mark.asyncio
+async def test_with_top_languages(mocker, api):
+    async def mock_get_user_repos(*args, **kwargs):
+        for repo in test_repos:
+            yield repo
+
+    async def mock_get(session, url, *args, **kwargs):
+        repo_num = int(re.search(r'test_user/repo(\d+)', url).group(1))
+        return ClientResponseMock(test_langs[repo_num])
+
+    mocker.patch(
+        'repolist.logic.API.get_user_repos',
+        mock_get_user_repos
+    )
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get
+    )
+
+    exptected = [
+        {
+            'language': 'lang2',
+            'byte_count': 5
+        },
+        {
+            'language': 'lang1',
+            'byte_count': 4
+        }
+    ]
+
+    actual = await api.get_users_language_list('test_user', top=2)
+    assert actual == exptected
+
+
+class GraphQLResponseMock:
+
+    def __init__(self, data, *, has_next_page=False):
+        self.status = 200
+        self.headers = {}
+        if data is None:
+            self._body = orjson.dumps({'data': {'repositoryOwner': None}})
+            return
+        nodes = []
+        for repo_langs in data:
+            edges = []
+            for lang_name, byte_count in repo_langs.items():
+                edges.append({'size': byte_count, 'node': {'name': lang_name}})
+            nodes.append({'languages': {'edges': edges}})
+        self._body = orjson.dumps({
+            'data': {
+                'repositoryOwner': {
+                    'repositories': {
+                        'pageInfo': {
+                            'endCursor': 'cursor',
+                            'hasNextPage': has_next_page
+                        },
+                        'nodes': nodes
+                    }
+                }
+            }
+        })
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def read(self):
+        return self._body
+
+
+@pytest.mark.asyncio
+async def test_with_graphql_pages(mocker):
+    # Pairs each response with the cursor its request should be sent with
+    mock_resps = iter([
+        (None, GraphQLResponseMock(
+            [test_langs[0], test_langs[1]], has_next_page=True)),
+        ('cursor', GraphQLResponseMock([test_langs[2]]))
+    ])
+
+    async def mock_post(*args, data, **kwargs):
+        cursor, res = next(mock_resps)
+        assert orjson.loads(data)['variables']['cursor'] == cursor
+        return res
+
+    mocker.patch(
+        'aiohttp.ClientSession.post',
+        mock_post
+    )
+
+    exptected = [
+        {
+            'language': 'lang2',
+            'byte_count': 5
+        },
+        {
+            'language': 'lang1',
+            'byte_count': 4
+        },
+        {
+            'language': 'lang3',
+            'byte_count': 3
+        }
+    ]
+
+    async with API('dummy.com', auth_token='token') as graphql_api:
+        actual = await graphql_api.get_users_language_list('test_user')
+    assert actual == exptected
+
+
+@pytest.mark.asyncio
+async def test_with_graphql_invalid_user(mocker):
+    async def mock_post(*args, **kwargs):
+        return GraphQLResponseMock(None)
+
+    mocker.patch(
+        'aiohttp.ClientSession.post',
+        mock_post
+    )
+
+    with pytest.raises(InvalidUserError):
+        async with API('dummy.com', auth_token='token') as graphql_api:
+            await graphql_api.get_users_language_list('test_user')
@@ -0,0 +1,73 @@
+import orjson
+import pytest
+
+test_repo = {
+    'id': 0,
+    'full_name': 'test_user/repo0',
+    'stargazers_count': 0
+}
+
+
+class ClientResponseMock:
+
+    def __init__(self, page, *, last_page=None):
+        self.status = 200
+        self._page = orjson.dumps(page)
+        if last_page is None:
+            self.headers = {}
+        else:
+            self.headers = {
+                'Link': '<t.io/users/test/repos?per_page=1&page=2>; '
+                        'rel="next", '
+                        f'<t.io/users/test/repos?per_page=1&page={last_page}>;'
+                        ' rel="last"'
+            }
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def read(self):
+        return self._page
+
+
+@pytest.mark.asyncio
+async def test_with_many_repos(mocker, api):
+    async def mock_get(*args, params, **kwargs):
+        assert params == {'per_page': 1, 'page': 1}
+        return ClientResponseMock([test_repo], last_page=42)
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get
+    )
+
+    assert 42 == await api.get_user_repo_count('test_user')
+
+
+@pytest.mark.asyncio
+async def test_with_one_repo(mocker, api):
+    async def mock_get(*args, **kwargs):
+        return ClientResponseMock([test_repo])
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get
+    )
+
+    assert 1 == await api.get_user_repo_count('test_user')
+
+
+@pytest.mark.asyncio
+async def test_with_no_repos(mocker, api):
+    async def mock_get(*args, **kwargs):
+        return ClientResponseMock([])
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get
+    )
+
+    assert 0 == await api.get_user_repo_count('test_user')
@@ -1,35 +1,35 @@
+import asyncio
+from operator import itemgetter
+
+import orjson
 import pytest
-from repolist.logic import API
-
-api = API('dummy.com')
-
-test_repos = []
-for i in range(7):
-    test_repos.append(
-        {
-            'id': i,
-            'full_name': f'test_user/repo{i}',
-            'stargazers_count': i
-        }
-    )
+from repolist.logic import UserQuotaExceededError
 
+test_repos = [
+    {
+        'id': i,
+        'full_name': f'test_user/repo{i}',
+        'stargazers_count': i
+    }
+    for i in range(7)
+]
 
-expected = []
-for item in test_repos:
-    expected.append(
-        {
-            'id': item['id'],
-            'name': item['full_name'],
-            'star_count': item['stargazers_count']
-        }
-    )
+
+expected = [
+    {
+        'id': item['id'],
+        'name': item['full_name'],
+        'star_count': item['stargazers_count']
+    }
+    for item in test_repos
+]
 
 
 class ClientResponseMock:
 
     def __init__(self, page, page_num, *, last_page):
         self.status = 200
-        self._page = page
+        self._page = orjson.dumps(page)
         if page_num == last_page:
             self.headers = {}
         else:
@@ -43,12 +43,15 @@ class ClientResponseMock:
     async def __aexit__(self, *args):
         pass
 
-    async def json(self):
+    async def read(self):
         return self._page
 
+    def release(self):
+        pass
+
 
 @pytest.mark.asyncio
-async def test_with_multiple_pages(mocker):
+async def test_with_multiple_pages(mocker, api):
     mock_resps = [
         ClientResponseMock(test_repos[:2], 1, last_page=4),
         ClientResponseMock(test_repos[2:4], 2, last_page=4),
@@ -66,12 +69,110 @@ async def test_with_multiple_pages(mocker):
     )
 
     ret = [repo async for repo in api.get_user_repos('test_user')]
-    actual = sorted(ret, key=lambda item: item['id'])
-    assert actual == expected
+    ret.sort(key=itemgetter('id'))
+    assert ret == expected
+
+
+@pytest.mark.asyncio
+async def test_with_page_before_other_link_params(mocker, api):
+    mock_resps = [
+        ClientResponseMock(test_repos[:4], 1, last_page=2),
+        ClientResponseMock(test_repos[4:], 2, last_page=2)
+    ]
+    mock_resps[0].headers = {
+        'Link': '<t.io/users/test/repos?page=2&per_page=100>; rel="next", '
+                '<t.io/users/test/repos?page=2&per_page=100>; rel="last"'
+    }
+    async def mock_get(*args, params, **kwargs):
+        return mock_resps[params['page'] - 1]
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get
+    )
+
+    ret = [repo async for repo in api.get_user_repos('test_user')]
+    ret.sort(key=itemgetter('id'))
+    assert ret == expected
 
 
 @pytest.mark.asyncio
-async def test_with_single_page(mocker):
+async def test_with_concurrent_pages(mocker, api):
+    mock_resps = [
+        ClientResponseMock(test_repos[:2], 1, last_page=4),
+        ClientResponseMock(test_repos[2:4], 2, last_page=4),
+        ClientResponseMock(test_repos[4:6], 3, last_page=4),
+        ClientResponseMock(test_repos[6:], 4, last_page=4)
+    ]
+    requested_pages = set()
+    all_requested = asyncio.Event()
+    async def mock_get(*args, params, **kwargs):
+        # Holds back pages 2 to 4 until all of them have been requested,
+        # which times out if the pages are fetched one by one
+        if (page := params['page']) > 1:
+            requested_pages.add(page)
+            if len(requested_pages) == 3:
+                all_requested.set()
+            await asyncio.wait_for(all_requested.wait(), 1)
+        return mock_resps[page - 1]
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get
+    )
+
+    ret = [repo async for repo in api.get_user_repos('test_user')]
+    ret.sort(key=itemgetter('id'))
+    assert ret == expected
+
+
+@pytest.mark.asyncio
+async def test_with_error_on_later_page(mocker, api):
+    mock_resps = [
+        ClientResponseMock(test_repos[:2], 1, last_page=4),
+        ClientResponseMock(test_repos[2:4], 2, last_page=4),
+        ClientResponseMock(test_repos[4:6], 3, last_page=4),
+        ClientResponseMock(test_repos[6:], 4, last_page=4)
+    ]
+    mock_resps[2].status = 403
+    async def mock_get(*args, params, **kwargs):
+        if (page := params.get('page')) is None:
+            page = 1
+        return mock_resps[page - 1]
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get
+    )
+
+    with pytest.raises(UserQuotaExceededError):
+        [repo async for repo in api.get_user_repos('test_user')]
+
+
+@pytest.mark.asyncio
+async def test_with_error_on_page_after_full_queue(mocker, api):
+    async def mock_get(*args, params, **kwargs):
+        res = ClientResponseMock(test_repos[:1], params['page'], last_page=40)
+        if params['page'] == 12:
+            res.status = 403
+        return res
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get
+    )
+
+    with pytest.raises(UserQuotaExceededError):
+        async for repo in api.get_user_repos('test_user'):
+            # Handles the repos slower than they're fetched,
+            # so that the workers are left waiting on a full queue
+            await asyncio.sleep(0.01)
+    tasks = asyncio.all_tasks() - {asyncio.current_task()}
+    assert all(task.done() for task in tasks)
+
+
+@pytest.mark.asyncio
+async def test_with_single_page(mocker, api):
     async def mock_get(*args, **kwargs):
         return ClientResponseMock(test_repos, 1, last_page=1)
 
@@ -81,12 +182,28 @@ async def test_with_single_page(mocker):
     )
 
     ret = [repo async for repo in api.get_user_repos('test_user')]
-    actual = sorted(ret, key=lambda item: item['id'])
-    assert actual == expected
+    ret.sort(key=itemgetter('id'))
+    assert ret == expected
+
+
+@pytest.mark.asyncio
+async def test_with_max_page_size(mocker, api):
+    requested_params = []
+    async def mock_get(*args, params, **kwargs):
+        requested_params.append(params)
+        return ClientResponseMock(test_repos, 1, last_page=1)
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get
+    )
+
+    [repo async for repo in api.get_user_repos('test_user')]
+    assert requested_params == [{'per_page': 100, 'page': 1}]
 
 
 @pytest.mark.asyncio
-async def test_with_no_repos(mocker):
+async def test_with_no_repos(mocker, api):
     async def mock_get(*args, **kwargs):
         return ClientResponseMock([], 1, last_page=1)
 
@@ -1,59 +1,161 @@
+import asyncio
+
+import orjson
 import pytest
-from repolist.logic import API
-
-api = API('dummy.com')
-
-test_repos = []
-for i in range(7):
-    test_repos.append(
-        {
-            'id': i,
-            'name': f'test_user/repo{i}',
-            'star_count': i
-        }
-    )
+from repolist.logic import API, UserQuotaExceededError
+
+test_repos = [
+    {
+        'id': i,
+        'full_name': f'test_user/repo{i}',
+        'stargazers_count': i
+    }
+    for i in range(7)
+]
+
+
+class ClientResponseMock:
+
+    def __init__(self, page):
+        self.status = 200
+        self.headers = {}
+        self._page = orjson.dumps(page)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def read(self):
+        return self._page
+
+    def release(self):
+        pass
 
 
 @pytest.mark.asyncio
-async def test_with_one_repo(mocker):
-    async def mock_get_user_repos(*args, **kwargs):
-        yield test_repos[0]
+@pytest.mark.parametrize(
+    'repos',
+    [test_repos[:1], test_repos, []],
+    ids=['one_repo', 'multiple_repos', 'no_repos']
+)
+async def test_with_single_page(mocker, api, repos):
+    async def mock_get(*args, **kwargs):
+        return ClientResponseMock(repos)
 
     mocker.patch(
-        'repolist.logic.API.get_user_repos',
-        mock_get_user_repos
+        'aiohttp.ClientSession.get',
+        mock_get
     )
 
-    expected = test_repos[0]['star_count'] 
+    expected = sum([data['stargazers_count'] for data in repos])
     assert expected == await api.get_user_star_total('test_user')
 
 
 @pytest.mark.asyncio
-async def test_with_multiple_repos(mocker):
-    async def mock_get_user_repos(*args, **kwargs):
-        for data in test_repos:
-            yield data
+async def test_with_multiple_pages(mocker, api):
+    mock_resps = [
+        ClientResponseMock(test_repos[:3]),
+        ClientResponseMock(test_repos[3:6]),
+        ClientResponseMock(test_repos[6:])
+    ]
+    mock_resps[0].headers = {
+        'Link': '<t.io/users/test/repos?page=3>; rel="last"'
+    }
+    async def mock_get(*args, params, **kwargs):
+        return mock_resps[params['page'] - 1]
 
     mocker.patch(
-        'repolist.logic.API.get_user_repos',
-        mock_get_user_repos
+        'aiohttp.ClientSession.get',
+        mock_get
     )
 
-    expected = sum([data['star_count'] for data in test_repos])
+    expected = sum([data['stargazers_count'] for data in test_repos])
     assert expected == await api.get_user_star_total('test_user')
 
 
 @pytest.mark.asyncio
-async def test_with_no_repos(mocker):
-    async def mock_get_user_repos(*args, **kwargs):
-        repos = []
+async def test_with_error_on_later_page(mocker, api):
+    cancelled_pages = []
+    first_res = ClientResponseMock(test_repos[:3])
+    first_res.headers = {
+        'Link': '<t.io/users/test/repos?page=4>; rel="last"'
+    }
+    error_res = ClientResponseMock([])
+    error_res.status = 403
+    async def mock_get(*args, params, **kwargs):
+        if (page := params['page']) == 1:
+            return first_res
+        elif page == 2:
+            return error_res
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled_pages.append(page)
+            raise
+
+    mocker.patch(
+        'aiohttp.ClientSession.get',
+        mock_get
+    )
+
+    with pytest.raises(UserQuotaExceededError):
+        await api.get_user_star_total('test_user')
+    await asyncio.sleep(0)
+    assert sorted(cancelled_pages) == [3, 4]
+
+
+class GraphQLResponseMock:
+
+    def __init__(self, repos, *, has_next_page=False):
+        self.status = 200
+        self.headers = {}
+        nodes = []
         for repo in repos:
-            yield repo
+            nodes.append({'stargazerCount': repo['stargazers_count']})
+        self._body = orjson.dumps({
+            'data': {
+                'repositoryOwner': {
+                    'repositories': {
+                        'pageInfo': {
+                            'endCursor': 'cursor',
+                            'hasNextPage': has_next_page
+                        },
+                        'nodes': nodes
+                    }
+                }
+            }
+        })
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def read(self):
+        return self._body
+
+
+@pytest.mark.asyncio
+async def test_with_graphql_pages(mocker):
+    # Pairs each response with the cursor its request should be sent with
+    mock_resps = iter([
+        (None, GraphQLResponseMock(test_repos[:4], has_next_page=True)),
+        ('cursor', GraphQLResponseMock(test_repos[4:]))
+    ])
+
+    async def mock_post(*args, data, **kwargs):
+        cursor, res = next(mock_resps)
+        assert orjson.loads(data)['variables']['cursor'] == cursor
+        return res
 
     mocker.patch(
-        'repolist.logic.API.get_user_repos',
-        mock_get_user_repos
+        'aiohttp.ClientSession.post',
+        mock_post
     )
 
-    expected = 0
-    assert expected == await api.get_user_star_total('test_user')
+    expected = sum([data['stargazers_count'] for data in test_repos])
+    async with API('dummy.com', auth_token='token') as graphql_api:
+        assert expected == await graphql_api.get_user_star_total('test_user')